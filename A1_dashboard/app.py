@@ -1,8 +1,5 @@
 import streamlit as st
-import polars as pl
-import requests
-import os
-from pathlib import Path
+from data import load_data
 
 st.set_page_config(
     page_title='NYC Taxi Dashboard 2024',
@@ -27,62 +24,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-trip_data_url = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024-01.parquet"
-trip_data_file = "yellow_tripdata_2024-01.parquet"
-
-@st.cache_data
-def download_file(url, file_path):
-    file_path = Path(file_path)
-    if not file_path.exists():
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
-            file_size_mb = os.path.getsize(file_path) / 1e6
-            print(f"Downloaded: {file_path.name} ({file_size_mb:.1f} MB)")
-            return True
-        except Exception as e:
-            st.error(f"Failed to download {url}: {e}")
-            st.stop()
-    else:
-        file_size_mb = os.path.getsize(file_path) / 1e6
-        print(f"File already exists: {file_path.name} ({file_size_mb:.1f} MB)")
-        return False
-
-@st.cache_data
-def load_trip_data():
-    download_file(trip_data_url, trip_data_file)
-
-    cols = [
-        "tpep_pickup_datetime",
-        "tpep_dropoff_datetime",
-        "PULocationID",
-        "DOLocationID",
-        "passenger_count",
-        "trip_distance",
-        "fare_amount",
-        "tip_amount",
-        "payment_type"
-    ]
-    df = pl.read_parquet(trip_data_file, columns=cols)
-
-    df = df.with_columns([
-        pl.col('tpep_pickup_datetime').dt.hour().alias('pickup_hour'),
-        (pl.col('tpep_pickup_datetime').dt.weekday() - 1).alias('pickup_weekday'),
-        pl.col('tpep_pickup_datetime').dt.date().alias('pickup_date'),
-        ((pl.col('tpep_dropoff_datetime') - pl.col('tpep_pickup_datetime')).dt.total_seconds() / 60).alias('trip_duration_min'),
-        ((pl.col('tip_amount') / pl.col('fare_amount')) * 100).fill_null(0).alias('tip_pct')
-    ])
-
-    df = df.drop_nulls(subset=["tpep_pickup_datetime", "tpep_dropoff_datetime", "PULocationID", "DOLocationID", "fare_amount"])
-    df = df.filter(pl.col("trip_distance").is_not_null() & (pl.col("trip_distance") > 0))
-    df = df.filter((pl.col('fare_amount') > 0) & (pl.col('fare_amount') < 500))
-    df = df.filter(pl.col('tpep_dropoff_datetime') > pl.col('tpep_pickup_datetime'))
-
-    return df
-
-df = load_trip_data()
+with st.spinner('Loading trip data...'):
+    _, _, _, summary = load_data()
 
 st.markdown('<p class="main-header">NYC Taxi Trip Dashboard</p>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">Exploring Yellow Taxi Data from January 2024 For Assignment 1</p>', unsafe_allow_html=True)
@@ -96,12 +39,12 @@ col1, col2, col3, col4, col5 = st.columns(5)
 with col1:
     st.metric(
         label="Total Trips",
-        value=f"{len(df):,}",
+        value=f"{summary['trip_count']:,}",
         help="Number of trips in our sample"
     )
 
 with col2:
-    avg_fare = df['fare_amount'].mean()
+    avg_fare = summary['avg_fare']
     st.metric(
         label="Average Fare",
         value=f"${avg_fare:.2f}",
@@ -109,7 +52,7 @@ with col2:
     )
 
 with col3:
-    avg_distance = df['trip_distance'].mean()
+    avg_distance = summary['avg_distance']
     st.metric(
         label="Avg Distance",
         value=f"{avg_distance:.2f} mi",
@@ -117,7 +60,7 @@ with col3:
     )
 
 with col4:
-    avg_duration = df['trip_duration_min'].mean()
+    avg_duration = summary['avg_duration']
     st.metric(
         label="Avg Duration",
         value=f"{avg_duration:.1f} min",
@@ -125,7 +68,7 @@ with col4:
     )
 
 with col5:
-    total_revenue = df['fare_amount'].sum()
+    total_revenue = summary['total_revenue']
     st.metric(
         label="Total Revenue",
         value=f"${total_revenue:,.2f}",
@@ -0,0 +1,146 @@
+import streamlit as st
+import pandas as pd
+import polars as pl
+import numpy as np
+import requests
+import os
+from pathlib import Path
+
+trip_data_url = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024-01.parquet"
+trip_data_file = "yellow_tripdata_2024-01.parquet"
+
+zone_data_url = "https://d37ci6vzurychx.cloudfront.net/misc/taxi_zone_lookup.csv"
+zone_data_file = "taxi_zone_lookup.csv"
+
+# payment_type codes 1-5 in TLC order; anything else is left missing
+payment_dtype = pd.CategoricalDtype(['Credit Card', 'Cash', 'No Charge', 'Dispute', 'Unknown'])
+
+@st.cache_data
+def download_file(url, file_path):
+    file_path = Path(file_path)
+    if not file_path.exists():
+        try:
+            # Stream to a .part file so a dropped connection can resume instead of restarting;
+            # the .etag file remembers which version of the remote file the partial bytes came from
+            part_path = file_path.with_name(file_path.name + '.part')
+            tag_path = file_path.with_name(file_path.name + '.part.etag')
+            headers = {}
+            if part_path.exists() and tag_path.exists():
+                # If-Range makes the server send the whole file again if it changed since
+                headers = {'Range': f'bytes={part_path.stat().st_size}-', 'If-Range': tag_path.read_text()}
+
+            response = requests.get(url, headers=headers, stream=True, timeout=30)
+            if response.status_code == 416:
+                # The leftover .part is no shorter than the remote file, so start over
+                response.close()
+                response = requests.get(url, stream=True, timeout=30)
+
+            with response:
+                response.raise_for_status()
+                if response.status_code == 206:
+                    mode = 'ab'
+                else:
+                    mode = 'wb'
+                    etag = response.headers.get('ETag')
+                    validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+                    if validator:
+                        tag_path.write_text(validator)
+                    else:
+                        tag_path.unlink(missing_ok=True)
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
+            part_path.replace(file_path)
+            tag_path.unlink(missing_ok=True)
+            file_size_mb = os.path.getsize(file_path) / 1e6
+            print(f"Downloaded: {file_path.name} ({file_size_mb:.1f} MB)")
+            return True
+        except Exception as e:
+            st.error(f"Failed to download {url}: {e}")
+            st.stop()
+    else:
+        file_size_mb = os.path.getsize(file_path) / 1e6
+        print(f"File already exists: {file_path.name} ({file_size_mb:.1f} MB)")
+        return False
+
+trip_cols = [
+    'tpep_pickup_datetime', 'tpep_dropoff_datetime',
+    'PULocationID', 'DOLocationID',
+    'passenger_count', 'trip_distance',
+    'fare_amount', 'tip_amount', 'payment_type'
+]
+
+# cache_resource so both pages and every rerun share one load instead of unpickling
+# a fresh copy; callers only read from what they get back
+@st.cache_resource(show_spinner=False)
+def load_data():
+    download_file(trip_data_url, trip_data_file)
+    download_file(zone_data_url, zone_data_file)
+
+    lf = pl.scan_parquet(trip_data_file).select(trip_cols)
+
+    # Only the rules both pages share go here, on the raw columns so polars pushes them into the parquet reader
+    trip_duration = pl.col('tpep_dropoff_datetime') - pl.col('tpep_pickup_datetime')
+    lf = lf.filter(
+        (pl.col('fare_amount') > 0) & (pl.col('fare_amount') < 500) &
+        (pl.col('tpep_dropoff_datetime') > pl.col('tpep_pickup_datetime'))
+    )
+
+    # Zero fares get a 0% tip
+    lf = lf.with_columns([
+        pl.col('tpep_pickup_datetime').dt.hour().cast(pl.Int32).alias('pickup_hour'),
+        (pl.col('tpep_pickup_datetime').dt.weekday() - 1).cast(pl.Int32).alias('pickup_weekday'),
+        pl.col('tpep_pickup_datetime').dt.truncate('1d').alias('pickup_date'),
+        (trip_duration.dt.total_milliseconds() / 60_000).alias('trip_duration_min'),
+        pl.when(pl.col('fare_amount') > 0)
+            .then(pl.col('tip_amount') / pl.col('fare_amount') * 100)
+            .otherwise(0)
+            .cast(pl.Float32)
+            .alias('tip_pct')
+    ])
+
+    # Streaming engine works through the file in batches instead of holding all of it
+    trips = lf.collect(engine='streaming')
+
+    # Landing page metrics use its own cleaning rules and the full float64 values, worked out once here
+    summary_trips = trips.drop_nulls(subset=["PULocationID", "DOLocationID", "trip_distance"]).filter(pl.col('trip_distance') > 0)
+    summary = {
+        'trip_count': summary_trips.height,
+        'avg_fare': summary_trips['fare_amount'].mean(),
+        'avg_distance': summary_trips['trip_distance'].mean(),
+        'avg_duration': summary_trips['trip_duration_min'].mean(),
+        'total_revenue': summary_trips['fare_amount'].sum()
+    }
+
+    # The charts only keep trips between 1 and 180 minutes, and don't need float64 precision
+    df = trips.filter((pl.col('trip_duration_min') > 1) & (pl.col('trip_duration_min') < 180)).with_columns([
+        pl.col('fare_amount').cast(pl.Float32),
+        pl.col('trip_distance').cast(pl.Float32),
+        pl.col('trip_duration_min').cast(pl.Float32)
+    ]).to_pandas()
+    del trips, summary_trips
+
+    zone_lookup = pd.read_csv(zone_data_file, usecols=['LocationID', 'Zone'])
+
+    df['PULocationID'] = df['PULocationID'].astype('category')
+    df['DOLocationID'] = df['DOLocationID'].astype('category')
+
+    payment_codes = df['payment_type'].fillna(0).to_numpy(dtype=np.int16) - 1
+    payment_codes = np.where((payment_codes >= 0) & (payment_codes < len(payment_dtype.categories)), payment_codes, -1)
+    df['payment_name'] = pd.Categorical.from_codes(payment_codes, dtype=payment_dtype)
+
+    # Sidebar bounds and options only depend on the loaded data, so work them out once here
+    sidebar = {
+        'min_date': df['pickup_date'].min().date(),
+        'max_date': df['pickup_date'].max().date(),
+        'fare_max': float(df['fare_amount'].max()),
+        'dist_max': float(df['trip_distance'].max()),
+        'passenger_options': ['All'] + sorted(df['passenger_count'].dropna().unique().astype(int).tolist()),
+        'payment_options': df['payment_name'].dropna().unique().tolist()
+    }
+
+    # Zone names indexed directly by LocationID, so lookups are an array gather instead of a merge
+    zone_names = np.empty(zone_lookup['LocationID'].max() + 1, dtype=object)
+    zone_names[zone_lookup['LocationID'].to_numpy()] = zone_lookup['Zone'].to_numpy()
+
+    return df, zone_names, sidebar, summary
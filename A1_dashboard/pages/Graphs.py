@@ -4,85 +4,112 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import requests
-import os
-from pathlib import Path
+from data import load_data
 
 st.set_page_config(page_title="Visualization Charts", page_icon="📊", layout="wide")
 
 st.title("Required Visualizations")
 
-trip_data_url = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024-01.parquet"
-trip_data_file = "yellow_tripdata_2024-01.parquet"
-
-zone_data_url = "https://d37ci6vzurychx.cloudfront.net/misc/taxi_zone_lookup.csv"
-zone_data_file = "taxi_zone_lookup.csv"
-
-@st.cache_data
-def download_file(url, file_path):
-    file_path = Path(file_path)
-    if not file_path.exists():
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
-            file_size_mb = os.path.getsize(file_path) / 1e6
-            print(f"Downloaded: {file_path.name} ({file_size_mb:.1f} MB)")
-            return True
-        except Exception as e:
-            st.error(f"Failed to download {url}: {e}")
-            st.stop()
-    else:
-        file_size_mb = os.path.getsize(file_path) / 1e6
-        print(f"File already exists: {file_path.name} ({file_size_mb:.1f} MB)")
-        return False
-
-@st.cache_data
-def load_data():
-    download_file(trip_data_url, trip_data_file)
-    download_file(zone_data_url, zone_data_file)
-
-    cols = [
-        'tpep_pickup_datetime', 'tpep_dropoff_datetime',
-        'PULocationID', 'DOLocationID',
-        'passenger_count', 'trip_distance',
-        'fare_amount', 'tip_amount', 'payment_type'
-    ]
-    df = pd.read_parquet(trip_data_file, columns=cols)
-    zone_lookup = pd.read_csv(zone_data_file)[['LocationID', 'Zone']]
-
-    df['tpep_pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
-    df['tpep_dropoff_datetime'] = pd.to_datetime(df['tpep_dropoff_datetime'])
-
-    df['pickup_hour'] = df['tpep_pickup_datetime'].dt.hour
-    df['pickup_weekday'] = df['tpep_pickup_datetime'].dt.dayofweek
-    df['pickup_date'] = df['tpep_pickup_datetime'].dt.date
-    df['trip_duration_min'] = (
-        df['tpep_dropoff_datetime'] - df['tpep_pickup_datetime']
-    ).dt.total_seconds() / 60
-    df['tip_pct'] = (df['tip_amount'] / df['fare_amount'] * 100).fillna(0)
-
-    df = df[(df['fare_amount'] > 0) & (df['fare_amount'] < 500)]
-    df = df[(df['trip_duration_min'] > 1) & (df['trip_duration_min'] < 180)]
-
-    df['PULocationID'] = df['PULocationID'].astype('category')
-    df['DOLocationID'] = df['DOLocationID'].astype('category')
-
-    payment_map = {1: 'Credit Card', 2: 'Cash', 3: 'No Charge', 4: 'Dispute', 5: 'Unknown'}
-    df['payment_name'] = df['payment_type'].map(payment_map)
-
-    return df, zone_lookup
+# Only the columns the charts read are gathered for the filtered rows
+agg_cols = ['payment_name', 'trip_distance', 'pickup_hour', 'fare_amount', 'pickup_weekday', 'PULocationID']
+
+# Underscore args are skipped by the cache hasher, so results are keyed on the dataset size and filters;
+# max_entries keeps only the most recent filter combinations instead of one per slider position forever
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_aggregations(dataset_rows, filter_key, _df, _zone_names):
+    (start_date, end_date, hour_min, hour_max, fare_min, fare_max,
+     dist_min, dist_max, selected_passengers, selected_payments) = filter_key
+
+    # Build one combined mask over the raw arrays and index the frame once
+    pickup_date = _df['pickup_date'].to_numpy()
+    pickup_hour = _df['pickup_hour'].to_numpy()
+    fare = _df['fare_amount'].to_numpy()
+    distance = _df['trip_distance'].to_numpy()
+
+    mask = (
+        (pickup_date >= np.datetime64(start_date, 'D')) &
+        (pickup_date <= np.datetime64(end_date, 'D')) &
+        (pickup_hour >= hour_min) &
+        (pickup_hour <= hour_max) &
+        (fare >= fare_min) &
+        (fare <= fare_max) &
+        (distance >= dist_min) &
+        (distance <= dist_max)
+    )
+
+    if selected_passengers != 'All':
+        mask &= _df['passenger_count'].to_numpy() == selected_passengers
+
+    if selected_payments:
+        # Look up each row's category code in a per-category table; the trailing False catches missing (-1) codes
+        payment_cat = _df['payment_name'].cat
+        allowed = np.append(payment_cat.categories.isin(selected_payments), False)
+        mask &= allowed[payment_cat.codes.to_numpy()]
+
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return {'filtered_count': 0}
+    filtered_df = _df.iloc[rows, [_df.columns.get_loc(col) for col in agg_cols]]
+
+    payment_counts = filtered_df['payment_name'].value_counts().reset_index()
+    payment_counts.columns = ['payment_type', 'count']
+    payment_counts = payment_counts[payment_counts['count'] > 0]
+
+    # Bin on the server so only 50 bars are sent to the browser, not every trip
+    distance = filtered_df['trip_distance'].to_numpy()
+    hist = np.histogram(distance, bins=50)
+
+    hour = filtered_df['pickup_hour'].to_numpy()
+    fare_sums = np.bincount(hour, weights=filtered_df['fare_amount'].to_numpy(), minlength=24)
+    trip_counts = np.bincount(hour, minlength=24)
+    has_trips = trip_counts > 0
+    hourly_fare = pd.DataFrame({
+        'pickup_hour': np.arange(24)[has_trips],
+        'avg_fare': fare_sums[has_trips] / trip_counts[has_trips]
+    })
+
+    # Only 7 x 24 cells, so count on a flat weekday*24 + hour index
+    weekday = filtered_df['pickup_weekday'].to_numpy()
+    heat = np.bincount(weekday * 24 + hour, minlength=7 * 24).reshape(7, 24)
+    weekday_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    heatmap_data = pd.DataFrame(heat, index=weekday_names, columns=range(24))
+
+    # Missing location IDs have code -1, which bincount cannot take, so leave them out
+    pickup_zone = filtered_df['PULocationID'].cat
+    zone_codes = pickup_zone.codes.to_numpy()
+    zone_counts = np.bincount(zone_codes[zone_codes >= 0], minlength=len(pickup_zone.categories))
+    # Busiest first with ties going to the lower LocationID, then flipped to ascending for the bar chart
+    top_codes = np.argsort(-zone_counts, kind='stable')[:10][::-1]
+    top_codes = top_codes[zone_counts[top_codes] > 0]
+    top_ids = pickup_zone.categories.to_numpy()[top_codes]
+    top_zones = pd.DataFrame({
+        'LocationID': top_ids,
+        'trip_count': zone_counts[top_codes],
+        'Zone': [
+            _zone_names[i] if i < len(_zone_names) and isinstance(_zone_names[i], str) else str(i)
+            for i in top_ids
+        ]
+    })
+
+    return {
+        'filtered_count': len(rows),
+        'payments': payment_counts,
+        'hist': hist,
+        'median_distance': float(np.median(distance)),
+        'hourly_fare': hourly_fare,
+        'heatmap': heatmap_data,
+        'top_zones': top_zones
+    }
 
 with st.spinner('Loading data for visualizations...'):
-    df, zone_lookup = load_data()
+    df, zone_names, sidebar, _ = load_data()
 
 # ============== SIDEBAR FILTERS ==============
 st.sidebar.header("Filters")
 
 st.sidebar.subheader("Date Range")
-min_date = df['pickup_date'].min()
-max_date = df['pickup_date'].max()
+min_date = sidebar['min_date']
+max_date = sidebar['max_date']
 
 date_range = st.sidebar.date_input(
     "Pick your dates:",
@@ -106,14 +133,14 @@ hour_min, hour_max = st.sidebar.slider(
 )
 
 st.sidebar.subheader("Passengers")
-passenger_options = ['All'] + sorted(df['passenger_count'].dropna().unique().astype(int).tolist())
+passenger_options = sidebar['passenger_options']
 selected_passengers = st.sidebar.selectbox("How many riders?", passenger_options)
 
 st.sidebar.subheader("Fare Range")
 fare_min, fare_max = st.sidebar.slider(
     "Fare ($):",
     min_value=0.0,
-    max_value=float(df['fare_amount'].max()),
+    max_value=sidebar['fare_max'],
     value=(0.0, 300.0),
     step=1.0
 )
@@ -122,13 +149,13 @@ st.sidebar.subheader("Distance")
 dist_min, dist_max = st.sidebar.slider(
     "Trip distance (miles):",
     min_value=0.0,
-    max_value=float(df['trip_distance'].max()),
+    max_value=sidebar['dist_max'],
     value=(0.0, 30.0),
     step=0.5
 )
 
 st.sidebar.subheader("Payment")
-payment_options = df['payment_name'].dropna().unique().tolist()
+payment_options = sidebar['payment_options']
 selected_payments = st.sidebar.multiselect(
     "Payment method(s):",
     options=payment_options,
@@ -136,30 +163,18 @@ selected_payments = st.sidebar.multiselect(
 )
 
 # ============== APPLY FILTERS ==============
-# No copy — just filter directly
-filtered_df = df[
-    (df['pickup_date'] >= start_date) &
-    (df['pickup_date'] <= end_date) &
-    (df['pickup_hour'] >= hour_min) &
-    (df['pickup_hour'] <= hour_max) &
-    (df['fare_amount'] >= fare_min) &
-    (df['fare_amount'] <= fare_max) &
-    (df['trip_distance'] >= dist_min) &
-    (df['trip_distance'] <= dist_max)
-]
-
-if selected_passengers != 'All':
-    filtered_df = filtered_df[filtered_df['passenger_count'] == selected_passengers]
-
-if selected_payments:
-    filtered_df = filtered_df[filtered_df['payment_name'].isin(selected_payments)]
+filter_key = (
+    start_date, end_date, hour_min, hour_max, fare_min, fare_max,
+    dist_min, dist_max, selected_passengers, tuple(selected_payments)
+)
+aggs = build_aggregations(len(df), filter_key, df, zone_names)
 
 st.sidebar.divider()
-st.sidebar.metric("Filtered Trips", f"{len(filtered_df):,}")
-st.sidebar.caption(f"out of {len(df):,} ({len(filtered_df)/len(df)*100:.1f}%)")
+st.sidebar.metric("Filtered Trips", f"{aggs['filtered_count']:,}")
+st.sidebar.caption(f"out of {len(df):,} ({aggs['filtered_count']/len(df)*100:.1f}%)")
 
 # ============== THE ACTUAL CHARTS ==============
-if len(filtered_df) == 0:
+if aggs['filtered_count'] == 0:
     st.warning("No trips match those filters.")
     st.stop()
 
@@ -171,11 +186,8 @@ with tab1:
     st.subheader("Breakdown of payment types")
     st.caption("Credit card payments dominate, while cash has second most amount of trips. Both 'No Charge' and 'Dispute' are very rare, and 'Unknown' is negligible.")
 
-    payment_counts = filtered_df['payment_name'].value_counts().reset_index()
-    payment_counts.columns = ['payment_type', 'count']
-
     fig = px.pie(
-        payment_counts,
+        aggs['payments'],
         values='count',
         names='payment_type',
         title='Payment Method Breakdown',
@@ -189,19 +201,26 @@ with tab2:
     st.subheader("Distribution of trip distances")
     st.caption("Most trips are short, but there are some long outliers. The median distance is around 1.7 miles.")
 
-    fig = px.histogram(
-        filtered_df,
-        x='trip_distance',
-        nbins=50,
+    counts, edges = aggs['hist']
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate='Distance: %{customdata[0]:.2f}-%{customdata[1]:.2f} mi<br>Trips: %{y:,}<extra></extra>',
+        marker_color='#E74C3C'
+    ))
+    fig.update_layout(
         title='Distance Distribution',
-        labels={'trip_distance': 'Distance (miles)', 'count': 'Trips'},
-        color_discrete_sequence=['#E74C3C']
+        xaxis_title='Distance (miles)',
+        yaxis_title='Trips',
+        bargap=0
     )
     fig.add_vline(
-        x=filtered_df['trip_distance'].median(),
+        x=aggs['median_distance'],
         line_dash='dash',
         line_color='blue',
-        annotation_text=f"Median: {filtered_df['trip_distance'].median():.2f} mi"
+        annotation_text=f"Median: {aggs['median_distance']:.2f} mi"
     )
     fig.update_layout(height=400)
     st.plotly_chart(fig, use_container_width=True)
@@ -210,9 +229,8 @@ with tab3:
     st.subheader("Average fare by hour of day")
     st.caption("The price of the trips tends to be higher during the morning and evening rush hours, likely due to increased demand and traffic congestion.")
 
-    hourly_fare = filtered_df.groupby('pickup_hour')['fare_amount'].mean().reset_index(name='avg_fare')
     fig2 = px.line(
-        hourly_fare,
+        aggs['hourly_fare'],
         x='pickup_hour',
         y='avg_fare',
         title='Average Fare by Hour of Day',
@@ -227,12 +245,7 @@ with tab4:
     st.subheader("Trips by day of week and hour")
     st.caption("The heatmap displays Monday–Friday on weekdays rush hours (8–9am and 5–6pm) are the busiest times for taxi trips, while late nights and weekends are decently not as busy.")
 
-    heatmap_data = filtered_df.groupby(['pickup_weekday', 'pickup_hour']).size().unstack(fill_value=0)
-    heatmap_data = heatmap_data.reindex(columns=range(24), fill_value=0)
-    heatmap_data = heatmap_data.reindex(index=range(7), fill_value=0)
-
-    weekday_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    heatmap_data.index = [weekday_names[i] for i in heatmap_data.index]
+    heatmap_data = aggs['heatmap']
 
     fig = px.imshow(
         heatmap_data,
@@ -249,14 +262,8 @@ with tab5:
     st.subheader("Top 10 pickup zones by trip count")
     st.caption("The busiest pickup zones are mostly in Manhattan, especially around Midtown and the Financial District. Some popular areas in Brooklyn and Queens also make the list.")
 
-    zone_counts = filtered_df['PULocationID'].value_counts().reset_index()
-    zone_counts.columns = ['LocationID', 'trip_count']
-    zone_counts = zone_counts.merge(zone_lookup, on='LocationID', how='left')
-    zone_counts['Zone'] = zone_counts['Zone'].fillna(zone_counts['LocationID'].astype(str))
-    top_zones = zone_counts.head(10).sort_values('trip_count', ascending=True)
-
     fig = px.bar(
-        top_zones,
+        aggs['top_zones'],
         x='trip_count',
         y='Zone',
         orientation='h',